@@ -1,13 +1,21 @@
+# Streamlit ejecuta este script como '__main__' sin __spec__, y los procesos del
+# pool de regiones lo volverían a ejecutar al arrancar. Con un spec llamado
+# '__main__' multiprocessing no lo reimporta en los procesos hijos
+import importlib.machinery
+__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import folium
 from streamlit_folium import folium_static
 import random
+import threading
 from plotly.subplots import make_subplots
+from regiones import REGIONES, crear_pool, cargar_regiones, combinar_agregados, calcular_kpis, unir_tablas, tabla_consolidada
 
 # Configuración de la página para tablet
 st.set_page_config(
@@ -66,102 +74,61 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Función para generar datos simulados
-@st.cache_data
-def generate_mock_data():
-    np.random.seed(42)
-    
-    # Datos de flota
-    vehicles = pd.DataFrame({
-        'vehicle_id': [f'VH-{i:03d}' for i in range(1, 16)],
-        'tipo': np.random.choice(['Blindado A', 'Blindado B', 'Camioneta'], 15),
-        'estado': np.random.choice(['Activo', 'En Ruta', 'Mantenimiento', 'Disponible'], 15, p=[0.4, 0.3, 0.1, 0.2]),
-        'km_dia': np.random.uniform(150, 350, 15),
-        'consumo_litros': np.random.uniform(20, 60, 15),
-        'eficiencia': np.random.uniform(0.75, 0.95, 15),
-        'ultima_parada': [datetime.now() - timedelta(minutes=np.random.randint(5, 120)) for _ in range(15)],
-        'lat': np.random.uniform(-12.08, -11.95, 15),
-        'lon': np.random.uniform(-77.08, -76.95, 15),
-        'ruta_cumplimiento': np.random.uniform(0.80, 1.0, 15)
-    })
-    
-    # Datos de supervisores
-    supervisores = pd.DataFrame({
-        'supervisor_id': [f'SUP-{i:03d}' for i in range(1, 11)],
-        'nombre': [f'Supervisor {i}' for i in range(1, 11)],
-        'clientes_asignados': np.random.randint(5, 15, 10),
-        'visitas_completadas': np.random.randint(3, 12, 10),
-        'cumplimiento': np.random.uniform(0.70, 1.0, 10),
-        'riesgo_score': np.random.uniform(0, 30, 10)
-    })
-    
-    # Datos de RRHH
-    guardias = pd.DataFrame({
-        'guardia_id': [f'GRD-{i:04d}' for i in range(1, 51)],
-        'nombre': [f'Guardia {i}' for i in range(1, 51)],
-        'turno': np.random.choice(['Mañana', 'Tarde', 'Noche'], 50),
-        'asistencia_real': np.random.choice(['Presente', 'Ausente', 'Tardanza'], 50, p=[0.8, 0.1, 0.1]),
-        'horas_extra': np.random.randint(0, 20, 50),
-        'salario_base': np.random.uniform(1500, 3000, 50),
-        'alertas_nomina': np.random.choice(['Sin alertas', 'Pago duplicado', 'Inconsistencia'], 50, p=[0.8, 0.1, 0.1])
-    })
-    
-    # Histórico para gráficos de tendencia
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-    historico = pd.DataFrame({
-        'fecha': dates,
-        'km_total': np.cumsum(np.random.uniform(3000, 5000, 30)),
-        'consumo_total': np.cumsum(np.random.uniform(400, 800, 30)),
-        'incidentes': np.random.poisson(2, 30),
-        'eficiencia_promedio': np.random.uniform(0.75, 0.95, 30)
-    })
-    
-    # Alertas en tiempo real
-    alertas = pd.DataFrame({
-        'timestamp': [datetime.now() - timedelta(minutes=i*5) for i in range(20)],
-        'tipo': np.random.choice(['Crítica', 'Advertencia', 'Información'], 20, p=[0.2, 0.4, 0.4]),
-        'categoria': np.random.choice(['Flota', 'Supervisión', 'RRHH', 'Seguridad'], 20),
-        'mensaje': [
-            'Exceso de consumo detectado en VH-005',
-            'Parada no autorizada - VH-008',
-            'Supervisor SUP-003 no cumplió visitas',
-            'Alerta de nómina: pago duplicado GRD-0015',
-            'Mantenimiento urgente requerido VH-012',
-            'Ruta optimizada disponible para VH-007',
-            'Ausentismo superior al 15% en turno noche',
-            'Cliente prioritario sin supervisión',
-            'Vehículo VH-003 fuera de ruta',
-            'Reemplazo necesario para GRD-0032',
-            'KPI de eficiencia bajo umbral crítico',
-            'Nuevo incidente reportado - Zona Norte',
-            'Actualización de seguridad disponible',
-            'Supervisor SUP-007 excede meta',
-            'Combustible bajo en VH-011',
-            'Alerta de velocidad VH-009',
-            'Cambio de turno sin cobertura',
-            'Cliente VIP solicita supervisión',
-            'Mantenimiento preventivo programado',
-            'Sistema de rastreo actualizado'
-        ][:20]
-    })
-    
-    return vehicles, supervisores, guardias, historico, alertas
+# Pool de procesos de carga, creado una sola vez para todo el servidor
+@st.cache_resource
+def get_pool_regiones():
+    return crear_pool()
 
-# Cargar datos
-vehicles, supervisores, guardias, historico, alertas = generate_mock_data()
+# Caché de particiones por región compartida entre sesiones: cada región se carga
+# una sola vez por día y agregar una región solo suma el costo de esa región.
+# El lock evita que dos sesiones carguen la misma región a la vez
+@st.cache_resource
+def get_particiones_cache():
+    return {'lock': threading.Lock(), 'particiones': {}}
+
+def cargar_particiones(regiones, fecha_carga):
+    cache = get_particiones_cache()
+    with cache['lock']:
+        particiones = cache['particiones']
+        # Se recargan las particiones de otro día para que los históricos coincidan
+        faltantes = [r for r in regiones if r not in particiones or particiones[r][0] != fecha_carga]
+        if faltantes:
+            for region, particion in cargar_regiones(faltantes, get_pool_regiones()).items():
+                particiones[region] = (fecha_carga, particion)
+        return {r: particiones[r][1] for r in regiones}
+
+# Tablas combinadas, KPIs y consolidado de un conjunto de regiones: se construyen
+# una vez por conjunto y día, no en cada interacción con los widgets
+@st.cache_data(ttl=timedelta(days=1))
+def cargar_vista(regiones, fecha_carga):
+    particiones = cargar_particiones(regiones, fecha_carga)
+    agregados = [agregado for _, agregado in particiones.values()]
+    return unir_tablas(particiones), calcular_kpis(combinar_agregados(agregados)), tabla_consolidada(particiones)
 
 # Header principal
 st.markdown("<h1 style='text-align: center; color: #ffffff; font-size: 2.5em; margin-bottom: 30px;'>🛡️ SecureFleet Pro - Centro de Control Integral</h1>", unsafe_allow_html=True)
 
+# Selector de región
+TODAS_REGIONES = 'Todas las regiones'
+region_cols = st.columns([1, 3])
+with region_cols[0]:
+    region_sel = st.selectbox("Región", [TODAS_REGIONES] + list(REGIONES))
+vista_global = region_sel == TODAS_REGIONES
+regiones_activas = list(REGIONES) if vista_global else [region_sel]
+
+# Cargar datos
+tablas, kpis, consolidado = cargar_vista(tuple(regiones_activas), date.today())
+vehicles, supervisores, guardias, historico, alertas = tablas
+
 # Panel de alertas en tiempo real (parte superior)
 with st.container():
     st.markdown("<h2>🚨 Centro de Alertas en Tiempo Real</h2>", unsafe_allow_html=True)
     
     alert_cols = st.columns([1, 3])
     with alert_cols[0]:
-        criticas = alertas[alertas['tipo'] == 'Crítica'].shape[0]
-        advertencias = alertas[alertas['tipo'] == 'Advertencia'].shape[0]
-        info = alertas[alertas['tipo'] == 'Información'].shape[0]
+        criticas = kpis['alertas_criticas']
+        advertencias = kpis['alertas_advertencia']
+        info = kpis['alertas_info']
         
         fig_alerts = go.Figure(data=[
             go.Bar(x=['Críticas', 'Advertencias', 'Info'], 
@@ -189,7 +156,7 @@ with st.container():
                 
                 st.markdown(f"""
                     <div class="{alert_class}">
-                        <strong>{alert['tipo']} - {alert['categoria']}</strong><br>
+                        <strong>{alert['tipo']} - {alert['categoria']} ({alert['region']})</strong><br>
                         {alert['mensaje']}<br>
                         <small>{alert['timestamp'].strftime('%H:%M:%S')}</small>
                     </div>
@@ -212,16 +179,16 @@ with tab1:
     # KPIs principales
     kpi_cols = st.columns(4)
     with kpi_cols[0]:
-        total_km = vehicles['km_dia'].sum()
+        total_km = kpis['total_km']
         st.metric("KM Recorridos Hoy", f"{total_km:,.0f}", "+12.3%")
     with kpi_cols[1]:
-        eficiencia_avg = vehicles['eficiencia'].mean()
+        eficiencia_avg = kpis['eficiencia_avg']
         st.metric("Eficiencia Promedio", f"{eficiencia_avg:.1%}", "-2.1%")
     with kpi_cols[2]:
-        consumo_total = vehicles['consumo_litros'].sum()
+        consumo_total = kpis['consumo_total']
         st.metric("Consumo Total (L)", f"{consumo_total:,.0f}", "+5.7%")
     with kpi_cols[3]:
-        cumplimiento = vehicles['ruta_cumplimiento'].mean()
+        cumplimiento = kpis['cumplimiento_rutas']
         st.metric("Cumplimiento Rutas", f"{cumplimiento:.1%}", "+3.2%")
     
     # Mapa y gráficos
@@ -230,15 +197,22 @@ with tab1:
     with map_col:
         st.markdown("### 🗺️ Mapa de Flota en Tiempo Real")
         
-        # Crear mapa con Folium
-        m = folium.Map(location=[-12.0464, -77.0428], zoom_start=11)
+        # Crear mapa con Folium centrado en la región seleccionada
+        if vista_global:
+            m = folium.Map(location=np.mean([REGIONES[r]['centro'] for r in regiones_activas], axis=0).tolist(), zoom_start=6)
+            m.fit_bounds([
+                [vehicles['lat'].min(), vehicles['lon'].min()],
+                [vehicles['lat'].max(), vehicles['lon'].max()]
+            ])
+        else:
+            m = folium.Map(location=REGIONES[region_sel]['centro'], zoom_start=11)
         
         for _, vehicle in vehicles.iterrows():
             color = 'green' if vehicle['estado'] == 'Activo' else 'orange' if vehicle['estado'] == 'En Ruta' else 'red'
             folium.CircleMarker(
                 [vehicle['lat'], vehicle['lon']],
                 radius=8,
-                popup=f"{vehicle['vehicle_id']} - {vehicle['estado']}",
+                popup=f"{vehicle['vehicle_id']} ({vehicle['region']}) - {vehicle['estado']}",
                 color=color,
                 fill=True,
                 fillColor=color
@@ -250,13 +224,17 @@ with tab1:
         # Gráfico de eficiencia por vehículo
         st.markdown("### 📈 Análisis de Rendimiento")
         
+        # Los 10 vehículos con menor eficiencia entre las regiones seleccionadas
+        vehicles_ranking = vehicles.nsmallest(10, 'eficiencia')
         fig_efficiency = px.bar(
-            vehicles.head(10),
+            vehicles_ranking,
             x='vehicle_id',
             y='eficiencia',
             color='eficiencia',
             color_continuous_scale='RdYlGn',
-            title="Eficiencia por Vehículo"
+            hover_data=['region'],
+            labels={'vehicle_id': 'Vehículo', 'eficiencia': 'Eficiencia', 'region': 'Región'},
+            title=f"Eficiencia por Vehículo - 10 más bajos ({region_sel})"
         )
         fig_efficiency.update_layout(
             height=200,
@@ -292,7 +270,7 @@ with tab1:
     
     if not vehicles_alert.empty:
         st.dataframe(
-            vehicles_alert[['vehicle_id', 'tipo', 'estado', 'eficiencia', 'alerta']],
+            vehicles_alert[['vehicle_id', 'region', 'tipo', 'estado', 'eficiencia', 'alerta']],
             use_container_width=True,
             hide_index=True
         )
@@ -304,35 +282,40 @@ with tab2:
     # KPIs de supervisión
     sup_kpi_cols = st.columns(4)
     with sup_kpi_cols[0]:
-        total_visitas = supervisores['visitas_completadas'].sum()
+        total_visitas = kpis['total_visitas']
         st.metric("Visitas Completadas", total_visitas, "+8")
     with sup_kpi_cols[1]:
-        cumplimiento_sup = supervisores['cumplimiento'].mean()
+        cumplimiento_sup = kpis['cumplimiento_sup']
         st.metric("Cumplimiento Global", f"{cumplimiento_sup:.1%}", "+5.2%")
     with sup_kpi_cols[2]:
-        clientes_total = supervisores['clientes_asignados'].sum()
+        clientes_total = kpis['clientes_total']
         st.metric("Clientes Activos", clientes_total, "+3")
     with sup_kpi_cols[3]:
-        riesgo_promedio = supervisores['riesgo_score'].mean()
+        riesgo_promedio = kpis['riesgo_promedio']
         st.metric("Score de Riesgo", f"{riesgo_promedio:.1f}", "-2.3")
     
     # Visualizaciones de supervisión
     sup_cols = st.columns(2)
     
     with sup_cols[0]:
-        # Mapa de calor de cumplimiento
+        # Mapa de calor de cumplimiento. Las zonas son locales a cada región, por eso
+        # en la vista global cada fila es una región y un turno
+        filas = supervisores['region'] + ' - ' + supervisores['turno'] if vista_global else supervisores['turno']
+        cumplimiento_zona = supervisores.assign(fila=filas).pivot_table(
+            index='fila', columns='zona', values='cumplimiento', aggfunc='mean'
+        ).reindex(filas.unique())
         fig_heatmap = go.Figure(data=go.Heatmap(
-            z=supervisores['cumplimiento'].values.reshape(2, 5),
-            x=[f'Zona {i}' for i in range(1, 6)],
-            y=['Turno AM', 'Turno PM'],
+            z=cumplimiento_zona.values,
+            x=cumplimiento_zona.columns.tolist(),
+            y=cumplimiento_zona.index.tolist(),
             colorscale='RdYlGn',
-            text=supervisores['cumplimiento'].values.reshape(2, 5),
+            text=cumplimiento_zona.values,
             texttemplate='%{text:.0%}',
             textfont={"size": 12},
         ))
         fig_heatmap.update_layout(
             title="Mapa de Calor - Cumplimiento por Zona",
-            height=300,
+            height=300 + 25 * max(len(cumplimiento_zona) - 2, 0),
             paper_bgcolor='rgba(0,0,0,0)',
             plot_bgcolor='rgba(0,0,0,0)',
             font=dict(color='white')
@@ -345,8 +328,8 @@ with tab2:
         
         fig_radar = go.Figure()
         
-        for i in range(3):
-            supervisor = supervisores.iloc[i]
+        # Top 3 por cumplimiento entre las regiones seleccionadas
+        for _, supervisor in supervisores.nlargest(3, 'cumplimiento').iterrows():
             values = [
                 supervisor['visitas_completadas'] / 15 * 100,
                 supervisor['cumplimiento'] * 100,
@@ -359,7 +342,7 @@ with tab2:
                 r=values,
                 theta=categories,
                 fill='toself',
-                name=supervisor['nombre']
+                name=f"{supervisor['nombre']} ({supervisor['region']})"
             ))
         
         fig_radar.update_layout(
@@ -369,7 +352,7 @@ with tab2:
                     range=[0, 100]
                 )
             ),
-            title="Desempeño Top 3 Supervisores",
+            title=f"Desempeño Top 3 Supervisores ({region_sel})",
             height=300,
             paper_bgcolor='rgba(0,0,0,0)',
             font=dict(color='white')
@@ -383,7 +366,7 @@ with tab2:
         lambda x: '✅ Óptimo' if x > 0.9 else '⚠️ Revisar' if x > 0.75 else '❌ Crítico'
     )
     st.dataframe(
-        supervisores_display[['supervisor_id', 'nombre', 'clientes_asignados', 'visitas_completadas', 'cumplimiento', 'estado']],
+        supervisores_display[['supervisor_id', 'region', 'nombre', 'clientes_asignados', 'visitas_completadas', 'cumplimiento', 'estado']],
         use_container_width=True,
         hide_index=True
     )
@@ -395,13 +378,13 @@ with tab3:
     # KPIs de RRHH
     rrhh_kpi_cols = st.columns(4)
     with rrhh_kpi_cols[0]:
-        asistencia = (guardias['asistencia_real'] == 'Presente').sum() / len(guardias)
+        asistencia = kpis['asistencia']
         st.metric("Asistencia", f"{asistencia:.1%}", "-3.2%")
     with rrhh_kpi_cols[1]:
-        horas_extra_total = guardias['horas_extra'].sum()
+        horas_extra_total = kpis['horas_extra_total']
         st.metric("Horas Extra", f"{horas_extra_total:,}", "+127")
     with rrhh_kpi_cols[2]:
-        alertas_nomina = (guardias['alertas_nomina'] != 'Sin alertas').sum()
+        alertas_nomina = kpis['alertas_nomina']
         st.metric("Alertas Nómina", alertas_nomina, "+2")
     with rrhh_kpi_cols[3]:
         cobertura = 0.92
@@ -468,13 +451,13 @@ with tab3:
     
     nomina_cols = st.columns(3)
     with nomina_cols[0]:
-        nomina_total = guardias['salario_base'].sum()
+        nomina_total = kpis['nomina_total']
         st.info(f"**Nómina Total:** ${nomina_total:,.0f}")
     with nomina_cols[1]:
-        pagos_duplicados = (guardias['alertas_nomina'] == 'Pago duplicado').sum()
+        pagos_duplicados = kpis['pagos_duplicados']
         st.warning(f"**Pagos Duplicados:** {pagos_duplicados}")
     with nomina_cols[2]:
-        inconsistencias = (guardias['alertas_nomina'] == 'Inconsistencia').sum()
+        inconsistencias = kpis['inconsistencias']
         st.error(f"**Inconsistencias:** {inconsistencias}")
     
     # Tabla de guardias con alertas
@@ -482,7 +465,7 @@ with tab3:
     if not guardias_alerta.empty:
         st.markdown("#### ⚠️ Personal con Alertas Activas")
         st.dataframe(
-            guardias_alerta[['guardia_id', 'nombre', 'turno', 'asistencia_real', 'alertas_nomina']],
+            guardias_alerta[['guardia_id', 'region', 'nombre', 'turno', 'asistencia_real', 'alertas_nomina']],
             use_container_width=True,
             hide_index=True
         )
@@ -494,6 +477,10 @@ with tab4:
     # Resumen ejecutivo
     st.markdown("### 📈 Resumen Ejecutivo")
     
+    # Supervisor y vehículos a destacar dentro de las regiones seleccionadas
+    supervisor_critico = supervisores.nsmallest(1, 'cumplimiento').iloc[0]['supervisor_id']
+    vehiculos_criticos = ', '.join(vehicles.nsmallest(2, 'eficiencia')['vehicle_id'])
+    
     exec_cols = st.columns(3)
     
     with exec_cols[0]:
@@ -509,12 +496,12 @@ with tab4:
         """, unsafe_allow_html=True)
     
     with exec_cols[1]:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
             <h4>👥 Supervisión</h4>
             <ul>
                 <li>2 clientes prioritarios sin cobertura</li>
-                <li>Supervisor SUP-003 bajo rendimiento crítico</li>
+                <li>Supervisor {supervisor_critico} bajo rendimiento crítico</li>
                 <li>Acción: Reasignar clientes VIP</li>
             </ul>
         </div>
@@ -532,6 +519,20 @@ with tab4:
         </div>
         """, unsafe_allow_html=True)
     
+    # Consolidado por región a partir de los agregados de cada partición
+    if vista_global:
+        st.markdown("### 🌎 Consolidado por Región")
+        st.dataframe(
+            consolidado,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Eficiencia': st.column_config.NumberColumn(format="%.3f"),
+                'Cumplimiento Rutas': st.column_config.NumberColumn(format="%.3f"),
+                'Asistencia': st.column_config.NumberColumn(format="%.3f")
+            }
+        )
+    
     # Matriz de decisiones
     st.markdown("### 🎮 Matriz de Decisiones Críticas")
     
@@ -541,7 +542,7 @@ with tab4:
         'Urgencia': [78, 85, 62, 95],
         'Riesgo': [65, 58, 45, 88],
         'Acción Recomendada': [
-            'Mantenimiento preventivo inmediato VH-005, VH-008',
+            f'Mantenimiento preventivo inmediato {vehiculos_criticos}',
             'Reasignar supervisor a cliente prioritario',
             'Activar personal de respaldo turno noche',
             'Actualización de protocolos de seguridad'
@@ -663,6 +664,6 @@ with footer_cols[0]:
 with footer_cols[1]:
     st.info(f"🔄 Última actualización: {datetime.now().strftime('%H:%M:%S')}")
 with footer_cols[2]:
-    st.warning("📡 15 dispositivos conectados")
+    st.warning(f"📡 {kpis['n_vehiculos']} dispositivos conectados")
 with footer_cols[3]:
     st.info("📊 Datos en tiempo real")
\ No newline at end of file
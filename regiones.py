@@ -0,0 +1,268 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Regiones operativas: código para los IDs, límites geográficos de la flota,
+# centro del mapa y semilla de los datos simulados. Agregar una ciudad solo
+# requiere una nueva entrada aquí.
+REGIONES = {
+    'Lima': {
+        'codigo': 'LIM',
+        'centro': [-12.0464, -77.0428],
+        'lat': (-12.08, -11.95),
+        'lon': (-77.08, -76.95),
+        'semilla': 42
+    },
+    'Arequipa': {
+        'codigo': 'AQP',
+        'centro': [-16.3989, -71.5350],
+        'lat': (-16.45, -16.35),
+        'lon': (-71.59, -71.49),
+        'semilla': 43
+    },
+    'Trujillo': {
+        'codigo': 'TRU',
+        'centro': [-8.1116, -79.0288],
+        'lat': (-8.16, -8.06),
+        'lon': (-79.08, -78.98),
+        'semilla': 44
+    },
+    'Cusco': {
+        'codigo': 'CUS',
+        'centro': [-13.5319, -71.9675],
+        'lat': (-13.56, -13.50),
+        'lon': (-72.01, -71.92),
+        'semilla': 45
+    }
+}
+
+MENSAJES_ALERTA = [
+    'Exceso de consumo detectado en {codigo}-VH-005',
+    'Parada no autorizada - {codigo}-VH-008',
+    'Supervisor {codigo}-SUP-003 no cumplió visitas',
+    'Alerta de nómina: pago duplicado {codigo}-GRD-0015',
+    'Mantenimiento urgente requerido {codigo}-VH-012',
+    'Ruta optimizada disponible para {codigo}-VH-007',
+    'Ausentismo superior al 15% en turno noche',
+    'Cliente prioritario sin supervisión',
+    'Vehículo {codigo}-VH-003 fuera de ruta',
+    'Reemplazo necesario para {codigo}-GRD-0032',
+    'KPI de eficiencia bajo umbral crítico',
+    'Nuevo incidente reportado - Zona Norte',
+    'Actualización de seguridad disponible',
+    'Supervisor {codigo}-SUP-007 excede meta',
+    'Combustible bajo en {codigo}-VH-011',
+    'Alerta de velocidad {codigo}-VH-009',
+    'Cambio de turno sin cobertura',
+    'Cliente VIP solicita supervisión',
+    'Mantenimiento preventivo programado',
+    'Sistema de rastreo actualizado'
+]
+
+
+# Genera las tablas simuladas de una sola región con un generador propio, para
+# que el resultado dependa solo de la semilla de la región
+def generar_datos_region(region):
+    config = REGIONES[region]
+    codigo = config['codigo']
+    rng = np.random.default_rng(config['semilla'])
+
+    # Datos de flota
+    vehicles = pd.DataFrame({
+        'vehicle_id': [f'{codigo}-VH-{i:03d}' for i in range(1, 16)],
+        'tipo': rng.choice(['Blindado A', 'Blindado B', 'Camioneta'], 15),
+        'estado': rng.choice(['Activo', 'En Ruta', 'Mantenimiento', 'Disponible'], 15, p=[0.4, 0.3, 0.1, 0.2]),
+        'km_dia': rng.uniform(150, 350, 15),
+        'consumo_litros': rng.uniform(20, 60, 15),
+        'eficiencia': rng.uniform(0.75, 0.95, 15),
+        'ultima_parada': [datetime.now() - timedelta(minutes=int(rng.integers(5, 120))) for _ in range(15)],
+        'lat': rng.uniform(*config['lat'], 15),
+        'lon': rng.uniform(*config['lon'], 15),
+        'ruta_cumplimiento': rng.uniform(0.80, 1.0, 15)
+    })
+
+    # Datos de supervisores
+    supervisores = pd.DataFrame({
+        'supervisor_id': [f'{codigo}-SUP-{i:03d}' for i in range(1, 11)],
+        'nombre': [f'Supervisor {codigo}-{i}' for i in range(1, 11)],
+        'clientes_asignados': rng.integers(5, 15, 10),
+        'visitas_completadas': rng.integers(3, 12, 10),
+        'cumplimiento': rng.uniform(0.70, 1.0, 10),
+        'riesgo_score': rng.uniform(0, 30, 10),
+        'zona': [f'Zona {i % 5 + 1}' for i in range(10)],
+        'turno': ['Turno AM'] * 5 + ['Turno PM'] * 5
+    })
+
+    # Datos de RRHH
+    guardias = pd.DataFrame({
+        'guardia_id': [f'{codigo}-GRD-{i:04d}' for i in range(1, 51)],
+        'nombre': [f'Guardia {codigo}-{i}' for i in range(1, 51)],
+        'turno': rng.choice(['Mañana', 'Tarde', 'Noche'], 50),
+        'asistencia_real': rng.choice(['Presente', 'Ausente', 'Tardanza'], 50, p=[0.8, 0.1, 0.1]),
+        'horas_extra': rng.integers(0, 20, 50),
+        'salario_base': rng.uniform(1500, 3000, 50),
+        'alertas_nomina': rng.choice(['Sin alertas', 'Pago duplicado', 'Inconsistencia'], 50, p=[0.8, 0.1, 0.1])
+    })
+
+    # Histórico para gráficos de tendencia
+    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
+    historico = pd.DataFrame({
+        'fecha': dates,
+        'km_total': np.cumsum(rng.uniform(3000, 5000, 30)),
+        'consumo_total': np.cumsum(rng.uniform(400, 800, 30)),
+        'incidentes': rng.poisson(2, 30),
+        'eficiencia_promedio': rng.uniform(0.75, 0.95, 30)
+    })
+
+    # Alertas en tiempo real
+    alertas = pd.DataFrame({
+        'timestamp': [datetime.now() - timedelta(minutes=i*5) for i in range(20)],
+        'tipo': rng.choice(['Crítica', 'Advertencia', 'Información'], 20, p=[0.2, 0.4, 0.4]),
+        'categoria': rng.choice(['Flota', 'Supervisión', 'RRHH', 'Seguridad'], 20),
+        'mensaje': [mensaje.format(codigo=codigo) for mensaje in MENSAJES_ALERTA[:20]]
+    })
+
+    tablas = (vehicles, supervisores, guardias, historico, alertas)
+    for tabla in tablas:
+        tabla['region'] = region
+    return tablas
+
+
+# Agregados parciales de una región: solo sumas y conteos, para que se puedan
+# combinar entre regiones sin volver a recorrer las tablas
+def agregar_region(vehicles, supervisores, guardias, historico, alertas):
+    return {
+        'n_vehiculos': len(vehicles),
+        'km_dia': float(vehicles['km_dia'].sum()),
+        'consumo_litros': float(vehicles['consumo_litros'].sum()),
+        'eficiencia': float(vehicles['eficiencia'].sum()),
+        'ruta_cumplimiento': float(vehicles['ruta_cumplimiento'].sum()),
+        'n_supervisores': len(supervisores),
+        'visitas_completadas': int(supervisores['visitas_completadas'].sum()),
+        'clientes_asignados': int(supervisores['clientes_asignados'].sum()),
+        'cumplimiento': float(supervisores['cumplimiento'].sum()),
+        'riesgo_score': float(supervisores['riesgo_score'].sum()),
+        'n_guardias': len(guardias),
+        'presentes': int((guardias['asistencia_real'] == 'Presente').sum()),
+        'horas_extra': int(guardias['horas_extra'].sum()),
+        'salario_base': float(guardias['salario_base'].sum()),
+        'alertas_nomina': int((guardias['alertas_nomina'] != 'Sin alertas').sum()),
+        'pagos_duplicados': int((guardias['alertas_nomina'] == 'Pago duplicado').sum()),
+        'inconsistencias': int((guardias['alertas_nomina'] == 'Inconsistencia').sum()),
+        'alertas_criticas': int((alertas['tipo'] == 'Crítica').sum()),
+        'alertas_advertencia': int((alertas['tipo'] == 'Advertencia').sum()),
+        'alertas_info': int((alertas['tipo'] == 'Información').sum())
+    }
+
+
+# Tarea de cada proceso: genera y agrega una región completa
+def cargar_region(region):
+    tablas = generar_datos_region(region)
+    return tablas, agregar_region(*tablas)
+
+
+# Tarea vacía de arranque: al recibirla cada proceso ya importa este módulo
+# (y pandas) antes de la primera carga real
+def _arrancar_proceso():
+    return os.getpid()
+
+
+# Pool de procesos para toda la vida del servidor. Se usa 'forkserver' para no
+# hacer fork del servidor de Streamlit mientras sus hilos están activos. Los
+# procesos arrancan en segundo plano con una tarea de arranque cada uno
+def crear_pool(max_workers=None):
+    workers = max_workers or min(len(REGIONES), os.cpu_count() or 1)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+    return {'executor': executor, 'arranque': [executor.submit(_arrancar_proceso) for _ in range(workers)]}
+
+
+# Carga las regiones en paralelo, una por proceso. Mientras el pool no terminó de
+# arrancar (o con una sola región) se cargan en el hilo actual, para no esperar
+# el arranque de los procesos ni pagar el envío de los DataFrames
+def cargar_regiones(regiones, pool=None):
+    regiones = list(regiones)
+    if len(regiones) == 1 or pool is None or not all(f.done() for f in pool['arranque']):
+        return {region: cargar_region(region) for region in regiones}
+
+    return dict(zip(regiones, pool['executor'].map(cargar_region, regiones)))
+
+
+# Combina los agregados parciales de varias regiones
+def combinar_agregados(agregados):
+    total = {}
+    for agregado in agregados:
+        for clave, valor in agregado.items():
+            total[clave] = total.get(clave, 0) + valor
+    return total
+
+
+# KPIs finales a partir de agregados (de una región o combinados)
+def calcular_kpis(agregado):
+    n_vehiculos = max(agregado['n_vehiculos'], 1)
+    n_supervisores = max(agregado['n_supervisores'], 1)
+    n_guardias = max(agregado['n_guardias'], 1)
+    return {
+        'n_vehiculos': agregado['n_vehiculos'],
+        'total_km': agregado['km_dia'],
+        'consumo_total': agregado['consumo_litros'],
+        'eficiencia_avg': agregado['eficiencia'] / n_vehiculos,
+        'cumplimiento_rutas': agregado['ruta_cumplimiento'] / n_vehiculos,
+        'total_visitas': agregado['visitas_completadas'],
+        'clientes_total': agregado['clientes_asignados'],
+        'cumplimiento_sup': agregado['cumplimiento'] / n_supervisores,
+        'riesgo_promedio': agregado['riesgo_score'] / n_supervisores,
+        'asistencia': agregado['presentes'] / n_guardias,
+        'horas_extra_total': agregado['horas_extra'],
+        'nomina_total': agregado['salario_base'],
+        'alertas_nomina': agregado['alertas_nomina'],
+        'pagos_duplicados': agregado['pagos_duplicados'],
+        'inconsistencias': agregado['inconsistencias'],
+        'alertas_criticas': agregado['alertas_criticas'],
+        'alertas_advertencia': agregado['alertas_advertencia'],
+        'alertas_info': agregado['alertas_info']
+    }
+
+
+# Une las tablas de varias particiones en las tablas que consume el dashboard
+def unir_tablas(particiones):
+    tablas = [tablas for tablas, _ in particiones.values()]
+    vehicles, supervisores, guardias, historico, alertas = (
+        pd.concat([t[i] for t in tablas], ignore_index=True) for i in range(5)
+    )
+
+    if len(tablas) > 1:
+        historico = historico.groupby(historico['fecha'].dt.normalize()).agg(
+            km_total=('km_total', 'sum'),
+            consumo_total=('consumo_total', 'sum'),
+            incidentes=('incidentes', 'sum'),
+            eficiencia_promedio=('eficiencia_promedio', 'mean')
+        ).reset_index()
+
+    alertas = alertas.sort_values('timestamp', ascending=False, ignore_index=True)
+    return vehicles, supervisores, guardias, historico, alertas
+
+
+# Tabla consolidada por región con una fila de total combinado
+def tabla_consolidada(particiones):
+    filas = [(region, agregado) for region, (_, agregado) in particiones.items()]
+    filas.append(('Total', combinar_agregados([agregado for _, agregado in filas])))
+
+    registros = []
+    for region, agregado in filas:
+        kpis = calcular_kpis(agregado)
+        registros.append({
+            'Región': region,
+            'Vehículos': kpis['n_vehiculos'],
+            'KM Hoy': round(kpis['total_km']),
+            'Eficiencia': kpis['eficiencia_avg'],
+            'Cumplimiento Rutas': kpis['cumplimiento_rutas'],
+            'Visitas': kpis['total_visitas'],
+            'Asistencia': kpis['asistencia'],
+            'Alertas Nómina': kpis['alertas_nomina'],
+            'Alertas Críticas': kpis['alertas_criticas']
+        })
+    return pd.DataFrame(registros)